@@ -1,8 +1,10 @@
-from typing import List
+import functools
+from typing import List, Optional
 
 from openai import OpenAI
 
 from musiccritic import logger
+from musiccritic.hedging import RequestHedger
 
 
 class ChatGPT:
@@ -22,6 +24,8 @@ class ChatGPT:
             between 0 and 2. Defaults to 0.7.
         model (str): The model identifier to use for text generation.
             Defaults to "gpt4".
+        hedger (Optional[RequestHedger]): If given, used to send hedged
+            requests to cut the tail latency of slow completions.
     """
 
     def __init__(
@@ -30,6 +34,8 @@ class ChatGPT:
         max_tokens: int = 1000,
         temperature: float = 0.7,
         model: str = "gpt-4",
+        hedger: Optional[RequestHedger] = None,
+        base_url: Optional[str] = None,
     ) -> None:
         """Initializes with an API key.
 
@@ -39,13 +45,24 @@ class ChatGPT:
             temperature: The higher the value, the more random the generated
                 text. Must be between 0 and 2.
             model: The model to use for generating text.
+            hedger: If given, used to send hedged requests.
+            base_url: If given, the URL of an OpenAI-compatible API to use
+                instead of OpenAI's, e.g. a local server for load tests.
         """
 
         self.openai_api_key = openai_api_key
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.model = model
-        self._client = OpenAI(api_key=openai_api_key)
+        self.hedger = hedger
+        self._client = OpenAI(api_key=openai_api_key, base_url=base_url)
+        self._hedge_client = None
+        if hedger is not None:
+            # Only duplicates are bounded, so a slow but valid completion
+            # still gets the client's default timeout and retries.
+            self._hedge_client = self._client.with_options(
+                timeout=hedger.hedge_timeout, max_retries=0
+            )
 
     def generate(self, messages: List) -> str:
         """Generates text using ChatGPT.
@@ -57,12 +74,25 @@ class ChatGPT:
             The generated text.
         """
         logger.info("Generating text with '%s'", self.model)
-        completion = self._client.chat.completions.create(
+        if self.hedger is None:
+            completion = self._create_completion(self._client, messages)
+        else:
+            completion = self.hedger.call(
+                functools.partial(
+                    self._create_completion, self._client, messages
+                ),
+                functools.partial(
+                    self._create_completion, self._hedge_client, messages
+                ),
+            )
+        generated_text = completion.choices[0].message.content
+        logger.info("Generated text with '%s'", self.model)
+        return generated_text
+
+    def _create_completion(self, client: OpenAI, messages: List):
+        return client.chat.completions.create(
             model=self.model,
             messages=messages,
             max_tokens=self.max_tokens,
             temperature=self.temperature,
         )
-        generated_text = completion.choices[0].message.content
-        logger.info("Generated text with '%s'", self.model)
-        return generated_text
@@ -5,7 +5,7 @@ that can be utilized for generating music critiques or analyses.
 """
 
 import copy
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from musiccritic import logger
 
@@ -42,8 +42,46 @@ class ChatGPTPromptPreparer:
             instruments=music_analysis["instruments"],
             voice=music_analysis["voice"],
             tempo=music_analysis["tempo"],
+            timeline=self._format_timeline(music_analysis.get("timeline")),
             lyrics=lyrics,
         )
         chat_gpt_messages[1]["content"] = filled_user_prompt
         logger.info("Prepared prompt for ChatGPT.")
         return chat_gpt_messages
+
+    def _format_timeline(
+        self, timeline: Optional[Dict[str, List[Dict[str, Any]]]]
+    ) -> str:
+        """
+        Formats how the analysis of a song evolves over time for the prompt.
+
+        Args:
+            timeline (Optional[Dict[str, List[Dict[str, Any]]]]): The
+                segments of each analysis, keyed by analyzer name.
+
+        Returns:
+            str: The formatted timeline, or an empty string if there's no
+                timeline.
+        """
+        if not timeline:
+            return ""
+        lines = ["\nHow the song evolves over time:"]
+        for analyzer_name, segments in timeline.items():
+            formatted_segments = ", ".join(
+                f"{_format_time(segment['start'])}-"
+                f"{_format_time(segment['end'])} "
+                + (
+                    f"{segment['bpm']} BPM"
+                    if "bpm" in segment
+                    else f"{segment['label']}"
+                )
+                for segment in segments
+            )
+            lines.append(f"- {analyzer_name}: {formatted_segments}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_time(seconds: float) -> str:
+    """Formats a time in seconds as minutes and seconds, e.g. '1:05'."""
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
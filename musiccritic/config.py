@@ -42,3 +42,26 @@ class Configs:
     VOICE_TOP_N_LABELS = 1
 
     TEMPO_MODEL_WEIGHTS_PATH = models_dir / "deepsquare-k16-3.pb"
+
+    SEGMENT_DURATION = 10.0
+
+    WARM_UP_DURATION = 10.0
+
+    PERSONAS_MAX_CONCURRENCY = 4
+
+    PIPELINE_DECODER_WORKERS = 2
+    PIPELINE_INFERENCE_WORKERS = 1
+    PIPELINE_NETWORK_WORKERS = 4
+    PIPELINE_QUEUE_SIZE = 4
+
+    HEDGING_INITIAL_THRESHOLD = 10.0
+    HEDGING_PERCENTILE = 95.0
+    HEDGING_WINDOW_SIZE = 100
+    HEDGING_MIN_SAMPLES = 20
+    HEDGING_BUDGET = 0.1
+    HEDGING_MAX_CONCURRENT_HEDGES = 4
+    # Timeout of duplicate requests, which are sent without retries. The
+    # original request keeps the OpenAI client's default timeout and
+    # retries, so slow completions still succeed. A shorter timeout frees
+    # duplicate slots sooner, but duplicates slower than it never win.
+    HEDGING_HEDGE_TIMEOUT = 60.0
@@ -4,8 +4,11 @@ for analyzing music, transcribing lyrics, preparing prompts, and generating
 text-based critiques using ChatGPT.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List
 
+from musiccritic import logger
 from musiccritic.chatgpt import ChatGPT
 from musiccritic.chatgptpromptpreparer import ChatGPTPromptPreparer
 from musiccritic.musicanalysis.musicanalyzers import MusicAnalyzers
@@ -48,7 +51,128 @@ class Critic:
             and transcribed lyrics.
         """
         music_analysis = self.music_analyzers.analyze(song_path)
+        return self.critique_from_analysis(song_path, music_analysis)
+
+    def critique_from_analysis(
+        self, song_path: Path, music_analysis: Dict[str, Any]
+    ) -> str:
+        """
+        Generates a text-based critique for a song that has already been
+        analyzed, transcribing its lyrics and querying ChatGPT.
+
+        Args:
+            song_path (Path): The path to the audio file of the song.
+            music_analysis (Dict[str, Any]): The music analysis results, as
+                returned by `MusicAnalyzers`.
+
+        Returns:
+            str: A text-based critique of the song combining its analysis
+            and transcribed lyrics.
+        """
         lyrics = self.lyrics_transcriber.transcribe(song_path)
         prompt = self.prompt_preparer.prepare(music_analysis, lyrics)
         critique = self.text_generator.generate(prompt)
         return critique
+
+    def critique_personas(
+        self,
+        song_path: Path,
+        personas: Dict[str, List[Dict[str, Any]]],
+        max_concurrency: int = 4,
+    ) -> Dict[str, str]:
+        """
+        Generates a text-based critique for a given song from each of
+        several personas.
+
+        The song is analyzed and its lyrics are transcribed only once, and
+        the critiques of all personas are then generated concurrently.
+
+        Args:
+            song_path (Path): The path to the audio file of the song.
+            personas (Dict[str, List[Dict[str, Any]]]): The ChatGPT message
+                templates of each persona, keyed by persona name, in the
+                format expected by `ChatGPTPromptPreparer`.
+            max_concurrency (int): Maximum number of critiques generated at
+                once.
+
+        Returns:
+            Dict[str, str]: The critiques keyed by persona name. Personas
+            whose critique failed are logged and left out.
+
+        Raises:
+            RuntimeError: If the critiques of all personas failed.
+        """
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            # The transcription is a network call, so it runs while the
+            # song is being analyzed.
+            lyrics_future = executor.submit(
+                self.lyrics_transcriber.transcribe, song_path
+            )
+            music_analysis = self.music_analyzers.analyze(song_path)
+            lyrics = lyrics_future.result()
+            return self._generate_persona_critiques(
+                executor, music_analysis, lyrics, personas
+            )
+
+    def critique_personas_from_analysis(
+        self,
+        song_path: Path,
+        music_analysis: Dict[str, Any],
+        personas: Dict[str, List[Dict[str, Any]]],
+        max_concurrency: int = 4,
+    ) -> Dict[str, str]:
+        """
+        Generates a text-based critique from each of several personas for a
+        song that has already been analyzed. The lyrics are transcribed
+        once and the critiques are generated concurrently.
+
+        Args:
+            song_path (Path): The path to the audio file of the song.
+            music_analysis (Dict[str, Any]): The music analysis results, as
+                returned by `MusicAnalyzers`.
+            personas (Dict[str, List[Dict[str, Any]]]): The ChatGPT message
+                templates of each persona, keyed by persona name.
+            max_concurrency (int): Maximum number of critiques generated at
+                once.
+
+        Returns:
+            Dict[str, str]: The critiques keyed by persona name. Personas
+            whose critique failed are logged and left out.
+
+        Raises:
+            RuntimeError: If the critiques of all personas failed.
+        """
+        lyrics = self.lyrics_transcriber.transcribe(song_path)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return self._generate_persona_critiques(
+                executor, music_analysis, lyrics, personas
+            )
+
+    def _generate_persona_critiques(
+        self,
+        executor: ThreadPoolExecutor,
+        music_analysis: Dict[str, Any],
+        lyrics: str,
+        personas: Dict[str, List[Dict[str, Any]]],
+    ) -> Dict[str, str]:
+        logger.info("Generating critiques for %d personas.", len(personas))
+        critique_futures = {}
+        for persona, chat_gpt_messages in personas.items():
+            prompt = ChatGPTPromptPreparer(chat_gpt_messages).prepare(
+                music_analysis, lyrics
+            )
+            critique_futures[persona] = executor.submit(
+                self.text_generator.generate, prompt
+            )
+
+        critiques = {}
+        for persona, future in critique_futures.items():
+            try:
+                critiques[persona] = future.result()
+            except Exception:
+                logger.exception(
+                    "Failed to generate the critique of '%s'.", persona
+                )
+        if personas and not critiques:
+            raise RuntimeError("The critiques of all personas failed.")
+        return critiques
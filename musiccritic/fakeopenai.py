@@ -0,0 +1,227 @@
+"""
+This module provides a local stand-in for the OpenAI API, answering chat
+completion and audio transcription requests after a configurable delay. It
+lets the critique pipeline be load tested without calling OpenAI.
+
+Classes:
+    LatencyDistribution: Samples response delays from a distribution.
+    FakeOpenAIServer: HTTP server mimicking the OpenAI endpoints.
+
+Functions:
+    main: Runs the fake server from the command line.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from musiccritic import logger
+
+FAKE_CRITIQUE = "What a song. I've heard more melody in a dial tone."
+FAKE_LYRICS = "La la la, this is a song about a song."
+
+
+class LatencyDistribution:
+    """
+    Samples response delays, in seconds, from a distribution.
+
+    Distributions are described by a specification string:
+        - "constant:SECONDS", e.g. "constant:0.5"
+        - "uniform:LOW,HIGH", e.g. "uniform:0.2,1.5"
+        - "lognormal:MEDIAN,SIGMA", e.g. "lognormal:1.0,0.5", a long-tailed
+          distribution similar to the latency of real API calls.
+
+    Attributes:
+        spec (str): The specification string of the distribution.
+    """
+
+    def __init__(self, spec: str) -> None:
+        """
+        Initializes the distribution from a specification string.
+
+        Args:
+            spec (str): The specification string of the distribution.
+
+        Raises:
+            ValueError: If the specification string is not valid.
+        """
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        try:
+            values = [float(value) for value in params.split(",")]
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution '{spec}'.")
+        if kind == "constant" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: random.uniform(*values)
+        elif kind == "lognormal" and len(values) == 2:
+            median, sigma = values
+            self._sample = lambda: median * random.lognormvariate(0, sigma)
+        else:
+            raise ValueError(f"Invalid latency distribution '{spec}'.")
+
+    def sample(self) -> float:
+        """Returns a random delay in seconds."""
+        return max(0.0, self._sample())
+
+
+class FakeOpenAIServer:
+    """
+    An HTTP server mimicking the OpenAI chat completion and audio
+    transcription endpoints. Each request is answered with canned text after
+    a delay sampled from the endpoint's latency distribution.
+
+    Attributes:
+        chat_latency (LatencyDistribution): Delay of chat completions.
+        transcription_latency (LatencyDistribution): Delay of audio
+            transcriptions.
+        host (str): The host the server listens on.
+        port (int): The port the server listens on.
+    """
+
+    def __init__(
+        self,
+        chat_latency: LatencyDistribution,
+        transcription_latency: LatencyDistribution,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Initializes the server. A port of 0 picks a free port.
+
+        Args:
+            chat_latency (LatencyDistribution): Delay of chat completions.
+            transcription_latency (LatencyDistribution): Delay of audio
+                transcriptions.
+            host (str): The host to listen on.
+            port (int): The port to listen on.
+        """
+        self.chat_latency = chat_latency
+        self.transcription_latency = transcription_latency
+        self._server = ThreadingHTTPServer(
+            (host, port), self._create_request_handler()
+        )
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """The base URL to give to the OpenAI client."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> None:
+        """Starts serving requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        logger.info("Fake OpenAI server listening on %s", self.base_url)
+
+    def serve_forever(self) -> None:
+        """Serves requests in the current thread until interrupted."""
+        logger.info("Fake OpenAI server listening on %s", self.base_url)
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops serving requests."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                content_length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(content_length)
+                if self.path.endswith("/chat/completions"):
+                    time.sleep(server.chat_latency.sample())
+                    response = _create_chat_completion(json.loads(body))
+                elif self.path.endswith("/audio/transcriptions"):
+                    time.sleep(server.transcription_latency.sample())
+                    response = {"text": FAKE_LYRICS}
+                else:
+                    self.send_error(404)
+                    return
+                response_body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return RequestHandler
+
+
+def _create_chat_completion(request: dict) -> dict:
+    """
+    Creates a chat completion response in the format of the OpenAI API.
+
+    Args:
+        request (dict): The chat completion request.
+
+    Returns:
+        dict: The chat completion response.
+    """
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": FAKE_CRITIQUE},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        },
+    }
+
+
+def main():
+    """Runs the fake OpenAI server until interrupted."""
+    parser = argparse.ArgumentParser(
+        description="Runs a local stand-in for the OpenAI API."
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--chat-latency",
+        type=str,
+        default="lognormal:5.0,0.5",
+        help="Latency distribution of chat completions.",
+    )
+    parser.add_argument(
+        "--transcription-latency",
+        type=str,
+        default="lognormal:2.0,0.5",
+        help="Latency distribution of audio transcriptions.",
+    )
+    args = parser.parse_args()
+    server = FakeOpenAIServer(
+        LatencyDistribution(args.chat_latency),
+        LatencyDistribution(args.transcription_latency),
+        args.host,
+        args.port,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
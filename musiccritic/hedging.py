@@ -0,0 +1,265 @@
+"""
+This module provides request hedging to cut the tail latency of slow remote
+calls, such as requests to the OpenAI API.
+
+A hedged call sends a request and, if it hasn't responded within an adaptive
+threshold, sends a duplicate. The first successful response is used and the
+other one is discarded.
+
+Classes:
+    HedgingMetrics: Counters describing how often hedging fired.
+    RequestHedger: Sends hedged requests with an adaptive threshold.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+from musiccritic import logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgingMetrics:
+    """
+    Counters describing how often a hedger sent duplicate requests.
+
+    Attributes:
+        requests (int): Number of hedged calls made.
+        hedges_fired (int): Number of duplicate requests sent.
+        hedges_won (int): Number of times the duplicate responded first.
+        hedges_suppressed (int): Number of times a duplicate would have been
+            sent, but the hedging budget was exhausted or too many
+            duplicates were already running.
+    """
+
+    requests: int = 0
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    hedges_suppressed: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        """The fraction of calls that sent a duplicate request."""
+        if self.requests == 0:
+            return 0.0
+        return self.hedges_fired / self.requests
+
+
+class RequestHedger:
+    """
+    Sends hedged requests, duplicating the ones that are slower than a
+    running percentile of recent latencies.
+
+    The original request runs on its own thread, started as soon as the
+    request is made, so the hedging threshold only counts the time the
+    request actually runs and the number of concurrent requests is only
+    limited by the callers. Duplicates run in a pool of limited size; a
+    duplicate that can't start right away is not sent, so duplicates never
+    queue behind each other.
+
+    The request is any callable without arguments, so a local stand-in that
+    sleeps for a chosen time can be used instead of a real API call. Calls
+    that are already running can't be interrupted, so the losing request is
+    cancelled if it hasn't started yet and otherwise runs to completion in
+    the background, with its result discarded. Callers can send a different
+    request as duplicate, bounded by `hedge_timeout` and without retries, so
+    that losing duplicates don't hold a slot for long while the original
+    request keeps its own timeout and retries.
+
+    Attributes:
+        name (str): Name of the hedged request, used in logs.
+        initial_threshold (float): Seconds to wait before hedging until
+            enough latencies have been recorded.
+        percentile (float): Percentile of recent latencies used as the
+            hedging threshold.
+        min_samples (int): Number of latencies needed before the percentile
+            is used as threshold.
+        hedge_budget (float): Maximum number of duplicate requests, as a
+            fraction of all calls.
+        hedge_timeout (float): Timeout in seconds callers should give to
+            duplicate requests.
+        metrics (HedgingMetrics): Counters describing how often hedging
+            fired.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_threshold: float = 10.0,
+        percentile: float = 95.0,
+        window_size: int = 100,
+        min_samples: int = 20,
+        hedge_budget: float = 0.1,
+        max_concurrent_hedges: int = 4,
+        hedge_timeout: float = 60.0,
+    ) -> None:
+        """
+        Initializes the hedger.
+
+        Args:
+            name: Name of the hedged request, used in logs.
+            initial_threshold: Seconds to wait before hedging until enough
+                latencies have been recorded.
+            percentile: Percentile of recent latencies used as the hedging
+                threshold. Must be between 0 and 100.
+            window_size: Number of recent latencies to keep.
+            min_samples: Number of latencies needed before the percentile is
+                used as threshold.
+            hedge_budget: Maximum number of duplicate requests, as a fraction
+                of all calls. E.g. 0.1 adds at most 10% extra requests.
+            max_concurrent_hedges: Maximum number of duplicate requests
+                running at once.
+            hedge_timeout: Timeout in seconds callers should give to
+                duplicate requests.
+        """
+        self.name = name
+        self.initial_threshold = initial_threshold
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedge_budget = hedge_budget
+        self.hedge_timeout = hedge_timeout
+        self.metrics = HedgingMetrics()
+        self._latencies = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._hedge_slots = threading.BoundedSemaphore(max_concurrent_hedges)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_hedges,
+            thread_name_prefix=f"hedger-{name}",
+        )
+
+    @property
+    def threshold(self) -> float:
+        """Seconds to wait for a response before sending a duplicate."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_threshold
+            latencies = sorted(self._latencies)
+        index = round(self.percentile / 100 * (len(latencies) - 1))
+        return latencies[index]
+
+    def call(
+        self,
+        request: Callable[[], T],
+        hedge_request: Optional[Callable[[], T]] = None,
+    ) -> T:
+        """
+        Calls a request, sending a duplicate if it's slower than the hedging
+        threshold and the hedging budget allows it.
+
+        Args:
+            request: The request to send. Must be safe to call twice if
+                `hedge_request` isn't given.
+            hedge_request: If given, the request to send as duplicate, e.g.
+                the same request with a shorter timeout and no retries.
+                Defaults to `request`.
+
+        Returns:
+            The result of the first request that succeeds.
+
+        Raises:
+            Exception: The error of the original request, if all the
+                requests that were sent failed.
+        """
+        threshold = self.threshold
+        with self._lock:
+            self.metrics.requests += 1
+        primary = Future()
+        started = threading.Event()
+        threading.Thread(
+            target=self._run_primary,
+            args=(request, primary, started),
+            name=f"hedger-{self.name}-primary",
+            daemon=True,
+        ).start()
+        started.wait()
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        if not self._reserve_hedge():
+            return primary.result()
+        logger.info(
+            "'%s' took longer than %.2f seconds, sending a hedged request.",
+            self.name,
+            threshold,
+        )
+        hedge = self._executor.submit(self._timed, hedge_request or request)
+        hedge.add_done_callback(lambda _: self._hedge_slots.release())
+        return self._first_successful_result(primary, hedge)
+
+    def shutdown(self) -> None:
+        """
+        Cancels the duplicate requests that haven't started yet and stops
+        accepting new ones. Duplicates that are already running finish in
+        the background.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def log_metrics(self) -> None:
+        """Logs how often hedging fired."""
+        logger.info(
+            "Hedging '%s': %d requests, %d hedges fired, %d won, "
+            "%d suppressed by the budget.",
+            self.name,
+            self.metrics.requests,
+            self.metrics.hedges_fired,
+            self.metrics.hedges_won,
+            self.metrics.hedges_suppressed,
+        )
+
+    def _run_primary(
+        self,
+        request: Callable[[], T],
+        primary: Future,
+        started: threading.Event,
+    ) -> None:
+        primary.set_running_or_notify_cancel()
+        started.set()
+        try:
+            primary.set_result(self._timed(request))
+        except BaseException as error:
+            primary.set_exception(error)
+
+    def _first_successful_result(self, primary: Future, hedge: Future):
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled() or future.exception() is not None:
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    with self._lock:
+                        self.metrics.hedges_won += 1
+                return future.result()
+        return primary.result()
+
+    def _reserve_hedge(self) -> bool:
+        with self._lock:
+            allowed_hedges = self.hedge_budget * self.metrics.requests
+            if self.metrics.hedges_fired + 1 > allowed_hedges:
+                self.metrics.hedges_suppressed += 1
+                return False
+            if not self._hedge_slots.acquire(blocking=False):
+                self.metrics.hedges_suppressed += 1
+                return False
+            self.metrics.hedges_fired += 1
+            return True
+
+    def _timed(self, request: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = request()
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
@@ -0,0 +1,755 @@
+"""
+This module is the entry point of the load generator, which measures how
+many critiques per minute a machine sustains and where it saturates.
+
+The load generator feeds critique requests with a configurable arrival rate
+and concurrency to the streaming pipeline, or directly to a Critic, over a
+corpus of local or synthetic tracks. OpenAI requests go to a fake OpenAI
+server running in a separate process. It reports throughput, per-stage
+latency percentiles, CPU and memory usage and queue depths, and writes them
+to a JSON file that later runs can be compared against.
+
+Classes:
+    LoadGenerator: Drives a Critic with a stream of critique requests.
+
+Functions:
+    create_synthetic_tracks: Writes synthetic audio tracks to a directory.
+    main: Runs the load generator from the command line.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from musiccritic import configs, logger
+from musiccritic.chatgpt import ChatGPT
+from musiccritic.chatgptpromptpreparer import ChatGPTPromptPreparer
+from musiccritic.critic import Critic
+from musiccritic.fakeopenai import LatencyDistribution
+from musiccritic.musiccritic import create_hedger, create_music_analyzers
+from musiccritic.pipeline import CritiquePipeline
+from musiccritic.prompt import chat_gpt_messages
+from musiccritic.whisper import Whisper
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a"}
+STAGES = ["analysis", "transcription", "generation", "service", "end_to_end"]
+PERCENTILES = [50, 90, 95, 99]
+
+
+class LoadGenerator:
+    """
+    Drives a Critic with critique requests arriving at a given rate, and
+    collects latency, resource usage and queue depth measurements.
+
+    Requests arrive following a Poisson process. By default they are fed to
+    a `CritiquePipeline`, whose per-stage metrics are reported alongside the
+    latencies. Otherwise, they wait in a queue until one of `concurrency`
+    threads is free to run `Critic.critique`. In both cases the analyzers
+    are shared, so music analysis is serialized. The latency of each stage
+    of the critique is measured separately, as well as the end-to-end
+    latency of each request, which includes the time spent waiting.
+
+    Attributes:
+        critic (Critic): The critic under test.
+        song_paths (List[Path]): The tracks to critique, used round-robin.
+        rate_per_minute (float): Average number of requests arriving per
+            minute. If 0, all requests arrive at once.
+        concurrency (int): Number of requests processed at once. With the
+            pipeline, the number of concurrent network stage workers.
+        num_requests (int): Total number of requests to send.
+        use_pipeline (bool): Whether to feed the requests to a
+            `CritiquePipeline` instead of calling the critic directly.
+        sample_interval (float): Seconds between resource usage samples.
+    """
+
+    def __init__(
+        self,
+        critic: Critic,
+        song_paths: List[Path],
+        rate_per_minute: float,
+        concurrency: int,
+        num_requests: int,
+        use_pipeline: bool = True,
+        sample_interval: float = 0.5,
+    ) -> None:
+        """
+        Initializes the load generator.
+
+        Args:
+            critic (Critic): The critic under test.
+            song_paths (List[Path]): The tracks to critique, used
+                round-robin.
+            rate_per_minute (float): Average number of requests arriving per
+                minute. If 0, all requests arrive at once.
+            concurrency (int): Number of requests processed at once. With
+                the pipeline, the number of concurrent network stage
+                workers.
+            num_requests (int): Total number of requests to send.
+            use_pipeline (bool): Whether to feed the requests to a
+                `CritiquePipeline` instead of calling the critic directly.
+            sample_interval (float): Seconds between resource usage samples.
+        """
+        self.critic = critic
+        self.song_paths = song_paths
+        self.rate_per_minute = rate_per_minute
+        self.concurrency = concurrency
+        self.num_requests = num_requests
+        self.use_pipeline = use_pipeline
+        self.sample_interval = sample_interval
+        self._latencies = {stage: [] for stage in STAGES}
+        self._timed_critic = Critic(
+            _TimedComponent(
+                critic.music_analyzers,
+                ["analyze", "analyze_audio"],
+                self._latencies["analysis"],
+                threading.Lock(),
+            ),
+            _TimedComponent(
+                critic.lyrics_transcriber,
+                ["transcribe"],
+                self._latencies["transcription"],
+            ),
+            critic.prompt_preparer,
+            _TimedComponent(
+                critic.text_generator,
+                ["generate"],
+                self._latencies["generation"],
+            ),
+        )
+        self._arrival_times = []
+        self._queue_depth = 0
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict:
+        """
+        Sends all the requests and waits for them to finish.
+
+        Returns:
+            Dict: The measurements of the run.
+        """
+        for latencies in self._latencies.values():
+            latencies.clear()
+        self._arrival_times = []
+        monitor = _ResourceMonitor(
+            None if self.use_pipeline else lambda: self._queue_depth,
+            self.sample_interval,
+        )
+        logger.info(
+            "Sending %d requests at %s per minute with concurrency %d%s.",
+            self.num_requests,
+            self.rate_per_minute or "unlimited",
+            self.concurrency,
+            " through the pipeline" if self.use_pipeline else "",
+        )
+
+        monitor.start()
+        start = time.perf_counter()
+        if self.use_pipeline:
+            pipeline_stages = self._run_pipeline()
+        else:
+            self._run_critic()
+        duration = time.perf_counter() - start
+        monitor.stop()
+
+        completed = len(self._latencies["end_to_end"])
+        results = {
+            "config": {
+                "rate_per_minute": self.rate_per_minute,
+                "concurrency": self.concurrency,
+                "num_requests": self.num_requests,
+                "num_tracks": len(self.song_paths),
+                "use_pipeline": self.use_pipeline,
+            },
+            "duration_seconds": duration,
+            "completed": completed,
+            "failed": self.num_requests - completed,
+            "throughput_per_minute": completed / duration * 60,
+            "latency_seconds": {
+                stage: _summarize(latencies)
+                for stage, latencies in self._latencies.items()
+            },
+            "cpu_percent": _summarize(monitor.cpu_percent),
+            "rss_mb": _summarize(monitor.rss_mb),
+        }
+        if self.use_pipeline:
+            results["pipeline_stages"] = pipeline_stages
+        else:
+            results["arrival_queue_depth"] = _summarize(monitor.queue_depth)
+        return results
+
+    def _arrivals(self) -> Iterator[Path]:
+        """Yields the songs to critique as their requests arrive."""
+        next_arrival = time.perf_counter()
+        for i in range(self.num_requests):
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            self._arrival_times.append(time.perf_counter())
+            yield self.song_paths[i % len(self.song_paths)]
+            if self.rate_per_minute > 0:
+                next_arrival += random.expovariate(self.rate_per_minute / 60)
+
+    def _run_pipeline(self) -> Dict[str, Dict[str, float]]:
+        pipeline = CritiquePipeline(
+            self._timed_critic,
+            decoder_workers=configs.PIPELINE_DECODER_WORKERS,
+            inference_workers=configs.PIPELINE_INFERENCE_WORKERS,
+            network_workers=self.concurrency,
+            queue_size=configs.PIPELINE_QUEUE_SIZE,
+            warm_up_duration=None,
+        )
+        pipeline.run(self._arrivals(), self._record_pipeline_critique)
+        return {
+            name: {
+                "processed": metrics.processed,
+                "failed": metrics.failed,
+                "busy_seconds": metrics.busy_seconds,
+                "queue_depth_samples": metrics.queue_depth_samples,
+                "mean_queue_depth": metrics.mean_queue_depth,
+                "max_queue_depth": metrics.max_queue_depth,
+            }
+            for name, metrics in pipeline.metrics.items()
+        }
+
+    def _record_pipeline_critique(
+        self, index: int, song_path: Path, critique: str
+    ) -> None:
+        self._latencies["end_to_end"].append(
+            time.perf_counter() - self._arrival_times[index]
+        )
+
+    def _run_critic(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for song_path in self._arrivals():
+                with self._lock:
+                    self._queue_depth += 1
+                executor.submit(
+                    self._critique, song_path, self._arrival_times[-1]
+                )
+
+    def _critique(self, song_path: Path, arrival_time: float) -> None:
+        with self._lock:
+            self._queue_depth -= 1
+        start = time.perf_counter()
+        try:
+            self._timed_critic.critique(song_path)
+        except Exception:
+            logger.exception("Failed to critique '%s'.", song_path)
+            return
+        end = time.perf_counter()
+        with self._lock:
+            self._latencies["service"].append(end - start)
+            self._latencies["end_to_end"].append(end - arrival_time)
+
+
+class _TimedComponent:
+    """
+    Wraps a component of the Critic, recording how long some of its methods
+    take. All other attributes are passed through to the component. If a
+    lock is given, the timed methods are serialized with it, and only the
+    time spent holding the lock is recorded.
+    """
+
+    def __init__(
+        self,
+        component,
+        method_names: List[str],
+        latencies: List[float],
+        lock: Optional[threading.Lock] = None,
+    ) -> None:
+        self._component = component
+        self._method_names = method_names
+        self._latencies = latencies
+        self._lock = lock or contextlib.nullcontext()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._component, name)
+        if name not in self._method_names:
+            return attribute
+
+        def timed_method(*args, **kwargs):
+            with self._lock:
+                start = time.perf_counter()
+                result = attribute(*args, **kwargs)
+                self._latencies.append(time.perf_counter() - start)
+            return result
+
+        return timed_method
+
+
+class _ResourceMonitor:
+    """
+    Samples the CPU usage and resident memory of the process, as well as an
+    optional queue depth, at regular intervals in a background thread.
+    """
+
+    def __init__(
+        self, queue_depth: Optional[Callable[[], int]], interval: float
+    ) -> None:
+        self.cpu_percent = []
+        self.rss_mb = []
+        self.queue_depth = []
+        self._get_queue_depth = queue_depth
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last_cpu_time = _get_cpu_time()
+        last_wall_time = time.perf_counter()
+        while not self._stopped.wait(self._interval):
+            cpu_time = _get_cpu_time()
+            wall_time = time.perf_counter()
+            self.cpu_percent.append(
+                (cpu_time - last_cpu_time) / (wall_time - last_wall_time) * 100
+            )
+            self.rss_mb.append(_get_rss_mb())
+            if self._get_queue_depth is not None:
+                self.queue_depth.append(self._get_queue_depth())
+            last_cpu_time, last_wall_time = cpu_time, wall_time
+
+
+def _get_cpu_time() -> float:
+    """Returns the user and system CPU time used by the process."""
+    times = os.times()
+    return times.user + times.system
+
+
+def _get_rss_mb() -> float:
+    """
+    Returns the resident memory of the process in MB. Falls back to the peak
+    resident memory where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    """
+    Summarizes a list of measurements with their mean, max and percentiles.
+
+    Args:
+        values (List[float]): The measurements.
+
+    Returns:
+        Dict[str, float]: The summary statistics of the measurements.
+    """
+    if not values:
+        return {"count": 0}
+    summary = {
+        "count": len(values),
+        "mean": float(np.mean(values)),
+        "max": float(np.max(values)),
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = float(np.percentile(values, percentile))
+    return summary
+
+
+def create_synthetic_tracks(
+    directory: Path,
+    num_tracks: int,
+    duration: float,
+    sample_rate: int = 44100,
+) -> List[Path]:
+    """
+    Writes synthetic tracks made of random chords and noise to a directory.
+
+    Args:
+        directory (Path): The directory to write the tracks to.
+        num_tracks (int): The number of tracks to write.
+        duration (float): The duration of each track in seconds.
+        sample_rate (int): The sample rate of the tracks.
+
+    Returns:
+        List[Path]: The paths to the written tracks.
+    """
+    rng = np.random.default_rng(0)
+    time_axis = np.arange(int(duration * sample_rate)) / sample_rate
+    song_paths = []
+    for i in range(num_tracks):
+        frequencies = 220 * 2 ** (rng.integers(0, 24, size=3) / 12)
+        signal = sum(np.sin(2 * np.pi * f * time_axis) for f in frequencies)
+        signal += 0.1 * rng.standard_normal(len(time_axis))
+        signal = signal / np.max(np.abs(signal)) * 0.8
+        song_path = directory / f"synthetic-{i}.wav"
+        with wave.open(str(song_path), "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes((signal * 32767).astype(np.int16).tobytes())
+        song_paths.append(song_path)
+    return song_paths
+
+
+def main():
+    """Main function that runs the load generator."""
+    args = _parse_command_line_args()
+
+    fake_server = None
+    base_url = args.openai_base_url
+    if base_url is None:
+        fake_server, base_url = _start_fake_server(
+            args.chat_latency, args.transcription_latency
+        )
+    try:
+        results = _run_load_test(args, base_url)
+    finally:
+        if fake_server is not None:
+            fake_server.terminate()
+            fake_server.wait()
+    if results is None:
+        return
+
+    # The baseline is read before the results are written, since both are
+    # usually the same file.
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    output_path = Path(args.output)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output_path}.")
+    _print_results(results)
+
+    if baseline is not None:
+        _print_comparison(results, baseline)
+
+
+def _start_fake_server(
+    chat_latency: str, transcription_latency: str, timeout: float = 30.0
+) -> Tuple[subprocess.Popen, str]:
+    """
+    Starts the fake OpenAI server in a separate process, so that its CPU
+    usage, memory and threads don't skew the measurements of the critic.
+
+    Args:
+        chat_latency (str): Latency distribution of chat completions.
+        transcription_latency (str): Latency distribution of audio
+            transcriptions.
+        timeout (float): Seconds to wait for the server to accept
+            connections.
+
+    Returns:
+        Tuple[subprocess.Popen, str]: The server process and the base URL to
+            give to the OpenAI client.
+
+    Raises:
+        RuntimeError: If the server doesn't start within the timeout.
+    """
+    # Fail here rather than in the server process on invalid specifications.
+    LatencyDistribution(chat_latency)
+    LatencyDistribution(transcription_latency)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "musiccritic.fakeopenai",
+            "--port",
+            str(port),
+            "--chat-latency",
+            chat_latency,
+            "--transcription-latency",
+            transcription_latency,
+        ]
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and process.poll() is None:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The fake OpenAI server failed to start.")
+
+
+def _run_load_test(args: argparse.Namespace, base_url: str) -> Optional[Dict]:
+    """
+    Creates the critic and runs the load test.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+        base_url (str): The base URL of the OpenAI-compatible server.
+
+    Returns:
+        Optional[Dict]: The results of the load test, or None if there are
+            no tracks to critique.
+    """
+    with tempfile.TemporaryDirectory() as synthetic_tracks_dir:
+        if args.corpus is not None:
+            song_paths = sorted(
+                path
+                for path in Path(args.corpus).iterdir()
+                if path.suffix.lower() in AUDIO_EXTENSIONS
+            )
+        else:
+            song_paths = create_synthetic_tracks(
+                Path(synthetic_tracks_dir),
+                args.synthetic_tracks,
+                args.synthetic_duration,
+            )
+        if not song_paths:
+            print(f"No audio files found in {args.corpus}.")
+            return None
+
+        transcription_hedger = None
+        generation_hedger = None
+        if args.hedge:
+            transcription_hedger = create_hedger("transcription", configs)
+            generation_hedger = create_hedger("generation", configs)
+        api_key = os.getenv("OPENAI_API_KEY", "fake")
+        critic = Critic(
+            create_music_analyzers(configs),
+            Whisper(api_key, hedger=transcription_hedger, base_url=base_url),
+            ChatGPTPromptPreparer(chat_gpt_messages),
+            ChatGPT(api_key, hedger=generation_hedger, base_url=base_url),
+        )
+        load_generator = LoadGenerator(
+            critic,
+            song_paths,
+            args.rate,
+            args.concurrency,
+            args.num_requests,
+            use_pipeline=not args.no_pipeline,
+        )
+        warm_up_time = None
+        if not args.no_warm_up:
+            warm_up_time = critic.music_analyzers.warm_up(
+                configs.WARM_UP_DURATION
+            )
+        results = load_generator.run()
+        results["warm_up_seconds"] = warm_up_time
+
+    for name, hedger in [
+        ("transcription", transcription_hedger),
+        ("generation", generation_hedger),
+    ]:
+        if hedger is not None:
+            results.setdefault("hedging", {})[name] = asdict(hedger.metrics)
+            hedger.shutdown()
+    return results
+
+
+def _print_results(results: Dict) -> None:
+    """
+    Prints a summary of the results of a load test.
+
+    Args:
+        results (Dict): The results of the load test.
+    """
+    if results.get("warm_up_seconds") is not None:
+        print(f"Warm-up took {results['warm_up_seconds']:.2f} seconds.")
+    print(
+        f"\nCompleted {results['completed']} critiques "
+        f"({results['failed']} failed) in "
+        f"{results['duration_seconds']:.1f} seconds: "
+        f"{results['throughput_per_minute']:.2f} critiques per minute."
+    )
+    print("\nLatency (seconds):")
+    for stage, summary in results["latency_seconds"].items():
+        print(f"  {stage:<14}{_format_summary(summary)}")
+    for name in ["cpu_percent", "rss_mb", "arrival_queue_depth"]:
+        if name in results:
+            print(f"{name:<20}{_format_summary(results[name])}")
+    for name, stage in results.get("pipeline_stages", {}).items():
+        line = (
+            f"Stage '{name}': {stage['processed']} processed, "
+            f"{stage['failed']} failed, {stage['busy_seconds']:.2f} busy "
+            "seconds"
+        )
+        if stage["queue_depth_samples"] > 0:
+            line += (
+                f", input queue depth mean {stage['mean_queue_depth']:.2f} "
+                f"max {stage['max_queue_depth']}"
+            )
+        print(line)
+
+
+def _print_comparison(results: Dict, baseline: Dict) -> None:
+    """
+    Prints the relative change of the main metrics compared to a baseline.
+
+    Args:
+        results (Dict): The results of the load test.
+        baseline (Dict): The results of an earlier load test.
+    """
+    print("\nChange compared to baseline:")
+    rows = [
+        ("throughput_per_minute", None, "throughput_per_minute", None),
+        ("cpu_percent mean", "cpu_percent", "mean", None),
+        ("rss_mb max", "rss_mb", "max", None),
+    ]
+    for stage in STAGES:
+        for percentile in ["p50", "p95", "p99"]:
+            rows.append(
+                (f"{stage} {percentile}", "latency_seconds", stage, percentile)
+            )
+    for label, section, key, percentile in rows:
+        current = _lookup(results, section, key, percentile)
+        previous = _lookup(baseline, section, key, percentile)
+        if current is None or previous is None:
+            continue
+        change = (current - previous) / previous * 100 if previous else 0.0
+        print(
+            f"  {label:<24}{previous:>10.2f} -> {current:>10.2f} "
+            f"({change:+.1f}%)"
+        )
+
+
+def _lookup(
+    results: Dict,
+    section: Optional[str],
+    key: str,
+    percentile: Optional[str],
+) -> Optional[float]:
+    value = results if section is None else results.get(section, {})
+    value = value.get(key)
+    if percentile is not None and value is not None:
+        value = value.get(percentile)
+    return value
+
+
+def _format_summary(summary: Dict[str, float]) -> str:
+    if summary["count"] == 0:
+        return "no samples"
+    return "  ".join(
+        f"{name} {summary[name]:.2f}"
+        for name in ["mean"] + [f"p{p}" for p in PERCENTILES] + ["max"]
+    )
+
+
+def _parse_command_line_args():
+    """
+    Parses command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Load tests the critique pipeline against a fake "
+        "OpenAI server."
+    )
+    parser.add_argument(
+        "--corpus",
+        type=str,
+        default=None,
+        help="Directory of audio files to critique. If not given, "
+        "synthetic tracks are used.",
+    )
+    parser.add_argument(
+        "--synthetic-tracks",
+        type=int,
+        default=4,
+        help="Number of synthetic tracks to generate.",
+    )
+    parser.add_argument(
+        "--synthetic-duration",
+        type=float,
+        default=30.0,
+        help="Duration of the synthetic tracks in seconds.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Average number of critiques requested per minute. 0 sends "
+        "all requests at once, to find the saturation throughput.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of critiques processed at once. With the pipeline, "
+        "the number of concurrent OpenAI stage workers.",
+    )
+    parser.add_argument(
+        "--num-requests",
+        type=int,
+        default=20,
+        help="Total number of critiques to request.",
+    )
+    parser.add_argument(
+        "--chat-latency",
+        type=str,
+        default="lognormal:5.0,0.5",
+        help="Latency distribution of the fake chat completions, e.g. "
+        "'constant:1', 'uniform:0.5,2' or 'lognormal:MEDIAN,SIGMA'.",
+    )
+    parser.add_argument(
+        "--transcription-latency",
+        type=str,
+        default="lognormal:2.0,0.5",
+        help="Latency distribution of the fake audio transcriptions.",
+    )
+    parser.add_argument(
+        "--openai-base-url",
+        type=str,
+        default=None,
+        help="Use an already running OpenAI-compatible server instead of "
+        "starting a fake one.",
+    )
+    parser.add_argument(
+        "--no-pipeline",
+        action="store_true",
+        help="Call the critic from --concurrency threads instead of feeding "
+        "the requests to the streaming pipeline.",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send hedged OpenAI requests.",
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="Don't warm up the music analyzers before the load test, to "
+        "measure the latency of a cold start.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="loadtest-results.json",
+        help="File to write the results to.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="Results file of an earlier run to compare against.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
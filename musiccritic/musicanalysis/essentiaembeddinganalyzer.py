@@ -12,7 +12,7 @@ Functions:
 """
 
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from essentia.standard import (
@@ -26,6 +26,7 @@ from musiccritic.musicanalysis.musicanalyzer import MusicAnalyzer
 from musiccritic.musicanalysis.scoretolabelconverter import (
     ScoreToLabelConverter,
 )
+from musiccritic.musicanalysis.segmentpooler import SegmentPooler
 
 
 class EssentiaEmbeddingAnalyzer(MusicAnalyzer):
@@ -38,6 +39,8 @@ class EssentiaEmbeddingAnalyzer(MusicAnalyzer):
         model: Classification model for prediction based on embeddings.
         score_to_label_converter (ScoreToLabelConverter): Converts prediction
             scores to meaningful labels.
+        segment_pooler (SegmentPooler): Pools the frame-level prediction
+            scores into segments for time-resolved labels.
     """
 
     def __init__(
@@ -46,6 +49,7 @@ class EssentiaEmbeddingAnalyzer(MusicAnalyzer):
         model,
         score_to_label_converter: ScoreToLabelConverter,
         analyzer_name: str,
+        segment_pooler: Optional[SegmentPooler] = None,
     ):
         """
         Initializes the analyzer with models and a converter.
@@ -55,10 +59,14 @@ class EssentiaEmbeddingAnalyzer(MusicAnalyzer):
             model: Essentia classification model instance.
             score_to_label_converter (ScoreToLabelConverter): Instance for
                 converting scores to labels.
+            segment_pooler (Optional[SegmentPooler]): Instance for pooling
+                frame-level scores into segments. Defaults to 10-second
+                segments.
         """
         self.embedding_model = embedding_model
         self.model = model
         self.score_to_label_converter = score_to_label_converter
+        self.segment_pooler = segment_pooler or SegmentPooler()
         super().__init__(analyzer_name)
 
     def analyze(self, audio: np.ndarray) -> List[str]:
@@ -71,8 +79,46 @@ class EssentiaEmbeddingAnalyzer(MusicAnalyzer):
         Returns:
             List[str]: Predicted labels for the audio signal.
         """
+        prediction_scores = self._predict(audio)
+        return self._convert_to_labels(prediction_scores)
+
+    def analyze_with_timeline(
+        self, audio: np.ndarray
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Analyzes an audio signal and returns predicted labels, as well as
+        the top label of each segment of the signal. The segments are pooled
+        from the frame-level scores used for the labels, so the models run
+        only once.
+
+        Args:
+            audio (np.ndarray): The audio signal to analyze.
+
+        Returns:
+            Tuple[List[str], List[Dict[str, Any]]]: Predicted labels for the
+                audio signal, and the segments of the signal with their
+                "start" and "end" times in seconds and their top "label".
+                Consecutive segments with the same label are merged.
+        """
+        prediction_scores = self._predict(audio)
+        labels = self._convert_to_labels(prediction_scores)
+        boundaries, segment_scores = self.segment_pooler.pool(
+            prediction_scores, len(audio)
+        )
+        segment_labels = self.score_to_label_converter.convert_top_1_per_row(
+            segment_scores
+        )
+        timeline = self.segment_pooler.merge(
+            boundaries, segment_labels, "label"
+        )
+        logger.info(f"Predicted timeline: {timeline}")
+        return labels, timeline
+
+    def _predict(self, audio: np.ndarray) -> np.ndarray:
         embeddings = self.embedding_model(audio)
-        prediction_scores = self.model(embeddings)
+        return self.model(embeddings)
+
+    def _convert_to_labels(self, prediction_scores: np.ndarray) -> List[str]:
         flattened_prediction_scores = np.sum(prediction_scores, axis=0)
         labels = self.score_to_label_converter.convert_top_n(
             flattened_prediction_scores
@@ -87,6 +133,7 @@ def create_essentia_jamendo_analyzer(
     model_metadata_path: Path,
     top_n: int,
     analyzer_name: str,
+    segment_pooler: Optional[SegmentPooler] = None,
 ) -> EssentiaEmbeddingAnalyzer:
     """
     Factory function to create an analyzer for music using the Jamendo dataset.
@@ -96,6 +143,8 @@ def create_essentia_jamendo_analyzer(
         model_weights_path (Path): Path to the model weights graph file.
         model_metadata_path (Path): Path to the model's metadata file.
         top_n (int): Number of top predictions to convert to labels.
+        segment_pooler (Optional[SegmentPooler]): Pools frame-level scores
+            into segments for time-resolved labels.
 
     Returns:
         EssentiaEmbeddingAnalyzer: Configured music analyzer instance.
@@ -109,7 +158,11 @@ def create_essentia_jamendo_analyzer(
     model = TensorflowPredict2D(graphFilename=str(model_weights_path))
 
     return EssentiaEmbeddingAnalyzer(
-        embedding_model, model, score_to_label_converter, analyzer_name
+        embedding_model,
+        model,
+        score_to_label_converter,
+        analyzer_name,
+        segment_pooler,
     )
 
 
@@ -118,6 +171,7 @@ def create_voice_gender_analyzer(
     model_weights_path: Path,
     model_metadata_path: Path,
     analyzer_name: str,
+    segment_pooler: Optional[SegmentPooler] = None,
 ) -> EssentiaEmbeddingAnalyzer:
     """
     Factory function to create an analyzer for detecting voice gender.
@@ -126,6 +180,8 @@ def create_voice_gender_analyzer(
         embedding_model_path (Path): Path to the VGGish embedding model's graph.
         model_weights_path (Path): Path to the classification model's graph.
         model_metadata_path (Path): Path to the model's metadata file.
+        segment_pooler (Optional[SegmentPooler]): Pools frame-level scores
+            into segments for time-resolved labels.
 
     Returns:
         EssentiaEmbeddingAnalyzer: Configured voice gender analyzer instance.
@@ -142,5 +198,9 @@ def create_voice_gender_analyzer(
     )
 
     return EssentiaEmbeddingAnalyzer(
-        embedding_model, model, score_to_label_converter, analyzer_name
+        embedding_model,
+        model,
+        score_to_label_converter,
+        analyzer_name,
+        segment_pooler,
     )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -16,3 +16,20 @@ class MusicAnalyzer(ABC):
     @abstractmethod
     def analyze(self, audio: np.ndarray):
         pass
+
+    def analyze_with_timeline(
+        self, audio: np.ndarray
+    ) -> Tuple[Any, Optional[List[Dict[str, Any]]]]:
+        """
+        Analyzes an audio signal and also returns how the analysis evolves
+        over time, as a list of segments with "start" and "end" times in
+        seconds. Analyzers that don't support this return no timeline.
+
+        Args:
+            audio (np.ndarray): The audio signal to analyze.
+
+        Returns:
+            Tuple[Any, Optional[List[Dict[str, Any]]]]: The same result as
+                `analyze`, and the timeline or None.
+        """
+        return self.analyze(audio), None
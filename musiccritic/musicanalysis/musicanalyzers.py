@@ -4,9 +4,13 @@ simultaneously on a given audio track. It facilitates running a collection of
 analyses and aggregating their results.
 """
 
+import time
 from pathlib import Path
 from typing import Dict, List
 
+import numpy as np
+
+from musiccritic import logger
 from musiccritic.musicanalysis.monoloader import load_mono_audio
 from musiccritic.musicanalysis.musicanalyzer import MusicAnalyzer
 
@@ -18,9 +22,14 @@ class MusicAnalyzers:
 
     Attributes:
         analyzers (List[MusicAnalyzer]): A list of music analyzer instances.
+        time_resolved (bool): Whether to also return how the analyses evolve
+            over time.
+        is_ready (bool): Whether the analyzers have been warmed up.
     """
 
-    def __init__(self, analyzers: List[MusicAnalyzer]):
+    def __init__(
+        self, analyzers: List[MusicAnalyzer], time_resolved: bool = False
+    ):
         """
         Initializes the MusicAnalyzers class with a list of music analyzer
         instances.
@@ -28,8 +37,51 @@ class MusicAnalyzers:
         Args:
             analyzers (List[MusicAnalyzer]): Music analyzer instances for
                 performing various analyses.
+            time_resolved (bool): Whether to also return how the analyses
+                evolve over time, under the "timeline" key.
         """
         self.analyzers = analyzers
+        self.time_resolved = time_resolved
+        self.is_ready = False
+
+    def warm_up(
+        self, duration: float = 10.0, sample_rate: int = 16000
+    ) -> float:
+        """
+        Runs every analyzer on a short synthetic signal, so that the
+        TensorFlow graphs are initialized and their memory is allocated
+        before the first song is analyzed. Otherwise this happens lazily and
+        makes the first song much slower to analyze than the following ones.
+
+        Args:
+            duration (float): The duration of the synthetic signal in
+                seconds. Must be long enough for the models' input patches.
+            sample_rate (int): The sample rate of the synthetic signal.
+
+        Returns:
+            float: The time the warm-up took in seconds.
+        """
+        logger.info("Warming up %d music analyzers.", len(self.analyzers))
+        rng = np.random.default_rng(0)
+        audio = (
+            0.01 * rng.standard_normal(int(duration * sample_rate))
+        ).astype(np.float32)
+        start = time.perf_counter()
+        for analyzer in self.analyzers:
+            analyzer_start = time.perf_counter()
+            analyzer.analyze(audio)
+            logger.info(
+                "Warmed up '%s' in %.2f seconds.",
+                analyzer.analyzer_name,
+                time.perf_counter() - analyzer_start,
+            )
+        warm_up_time = time.perf_counter() - start
+        self.is_ready = True
+        logger.info(
+            "Music analyzers ready after %.2f seconds of warm-up.",
+            warm_up_time,
+        )
+        return warm_up_time
 
     def analyze(self, song_path: Path) -> Dict[str, any]:
         """
@@ -44,7 +96,36 @@ class MusicAnalyzers:
                 analyzer names as keys and their analysis outputs as values.
         """
         audio = load_mono_audio(song_path)
+        return self.analyze_audio(audio)
+
+    def analyze_audio(self, audio: np.ndarray) -> Dict[str, any]:
+        """
+        Analyzes an already decoded audio signal using all configured music
+        analyzers and aggregates their results.
+
+        This lets callers decode tracks separately from inference, e.g. to
+        overlap the two in a batch pipeline.
+
+        Args:
+            audio (np.ndarray): The mono audio signal to be analyzed.
+
+        Returns:
+            Dict[str, any]: A dictionary containing analysis results, with
+                analyzer names as keys and their analysis outputs as values.
+                If time_resolved is set, the "timeline" key maps analyzer
+                names to the segments returned by their timelines.
+        """
         analysis = {}
+        if not self.time_resolved:
+            for analyzer in self.analyzers:
+                analysis[analyzer.analyzer_name] = analyzer.analyze(audio)
+            return analysis
+
+        timelines = {}
         for analyzer in self.analyzers:
-            analysis[analyzer.analyzer_name] = analyzer.analyze(audio)
+            result, timeline = analyzer.analyze_with_timeline(audio)
+            analysis[analyzer.analyzer_name] = result
+            if timeline is not None:
+                timelines[analyzer.analyzer_name] = timeline
+        analysis["timeline"] = timelines
         return analysis
@@ -22,6 +22,8 @@ class ScoreToLabelConverter:
     Methods:
         convert(scores: np.ndarray) -> List[str]:
             Converts an array of scores into class labels.
+        convert_top_1_per_row(scores: np.ndarray) -> List[str]:
+            Converts each row of a 2D array of scores into its top label.
     """
 
     def __init__(self, model_metadata_path: Path, top_n: int = 5):
@@ -50,6 +52,21 @@ class ScoreToLabelConverter:
         top_n_indices = self._get_top_n_indices(scores)
         return [self.labels[i] for i in top_n_indices]
 
+    def convert_top_1_per_row(self, scores: np.ndarray) -> List[str]:
+        """
+        Converts each row of a 2D array of scores, e.g. the scores of
+        consecutive segments of a track, into its top class label.
+
+        Args:
+            scores (np.ndarray): A 2D array of prediction scores, with one
+                row per segment.
+
+        Returns:
+            List[str]: The top class label of each row.
+        """
+        top_indices = np.argmax(scores, axis=1)
+        return [self.labels[i] for i in top_indices]
+
     def _get_top_n_indices(self, scores: np.ndarray) -> List[int]:
         """
         Identifies the indices of the top N scores.
@@ -0,0 +1,124 @@
+"""
+This module provides a class for pooling frame-level model outputs into
+fixed-length time segments, so that the outputs a model already computed
+for a whole track can also describe how the track evolves over time.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+
+class SegmentPooler:
+    """
+    A class that pools frame-level values, such as prediction scores or
+    local tempo estimates, into fixed-length segments with vectorized
+    windowed pooling.
+
+    The duration of a frame is inferred from the duration of the audio and
+    the number of frames, so the pooler works with any model that outputs
+    evenly spaced frames.
+
+    Attributes:
+        segment_duration (float): The duration of a segment in seconds.
+        sample_rate (int): The sample rate of the analyzed audio.
+    """
+
+    def __init__(
+        self, segment_duration: float = 10.0, sample_rate: int = 16000
+    ) -> None:
+        """
+        Initializes the SegmentPooler.
+
+        Args:
+            segment_duration (float): The duration of a segment in seconds.
+            sample_rate (int): The sample rate of the analyzed audio.
+        """
+        self.segment_duration = segment_duration
+        self.sample_rate = sample_rate
+
+    def pool(
+        self,
+        frame_values: np.ndarray,
+        num_samples: int,
+        reduce: Callable = np.nanmean,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pools frame-level values into segments.
+
+        Args:
+            frame_values (np.ndarray): The frame-level values, with frames
+                along the first axis.
+            num_samples (int): The number of samples of the analyzed audio.
+            reduce (Callable): The NaN-aware function used to pool the
+                frames of a segment, e.g. `np.nanmean` or `np.nanmedian`.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The start and end times of the
+                segments in seconds, with shape (num_segments, 2), and the
+                pooled values, with segments along the first axis.
+        """
+        frame_values = np.asarray(frame_values, dtype=float)
+        num_frames = len(frame_values)
+        if num_frames == 0:
+            return np.empty((0, 2)), frame_values
+        values = frame_values.reshape(num_frames, -1)
+
+        duration = num_samples / self.sample_rate
+        frame_duration = duration / num_frames
+        frames_per_segment = max(
+            1, round(self.segment_duration / frame_duration)
+        )
+        num_segments = -(-num_frames // frames_per_segment)
+
+        # Pad the last segment with NaNs so that all the segments can be
+        # pooled at once and the padding is ignored by the reduction.
+        padded_values = np.full(
+            (num_segments * frames_per_segment, values.shape[1]), np.nan
+        )
+        padded_values[:num_frames] = values
+        pooled_values = reduce(
+            padded_values.reshape(num_segments, frames_per_segment, -1),
+            axis=1,
+        )
+
+        starts = np.arange(num_segments) * frames_per_segment * frame_duration
+        ends = np.minimum(
+            starts + frames_per_segment * frame_duration, duration
+        )
+        boundaries = np.stack([starts, ends], axis=1)
+        return boundaries, pooled_values.reshape(
+            (num_segments,) + frame_values.shape[1:]
+        )
+
+    @staticmethod
+    def merge(
+        boundaries: np.ndarray, values: List[Any], key: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Merges consecutive segments with the same value.
+
+        Args:
+            boundaries (np.ndarray): The start and end times of the segments
+                in seconds, with shape (num_segments, 2).
+            values (List[Any]): The value of each segment.
+            key (str): The name under which the value is stored.
+
+        Returns:
+            List[Dict[str, Any]]: The merged segments, each with its "start"
+                and "end" time in seconds and its value.
+        """
+        if len(values) == 0:
+            return []
+        values = np.asarray(values)
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        first_indices = np.concatenate([[0], changes])
+        last_indices = np.concatenate([changes, [len(values)]]) - 1
+        return [
+            {
+                "start": round(float(boundaries[first, 0]), 2),
+                "end": round(float(boundaries[last, 1]), 2),
+                key: values[first].item(),
+            }
+            for first, last in zip(first_indices, last_indices)
+        ]
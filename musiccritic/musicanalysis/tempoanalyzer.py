@@ -4,12 +4,14 @@ providing functionality to analyze audio signals and estimate their tempo.
 """
 
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from essentia.standard import TempoCNN
 
 from musiccritic import logger
 from musiccritic.musicanalysis.musicanalyzer import MusicAnalyzer
+from musiccritic.musicanalysis.segmentpooler import SegmentPooler
 
 
 class TempoAnalyzer(MusicAnalyzer):
@@ -19,16 +21,26 @@ class TempoAnalyzer(MusicAnalyzer):
 
     Attributes:
         model (TempoCNN): The loaded TempoCNN model for tempo estimation.
+        segment_pooler (SegmentPooler): Pools the local tempo estimates into
+            segments for a local tempo curve.
     """
 
-    def __init__(self, model_weights_path: Path) -> None:
+    def __init__(
+        self,
+        model_weights_path: Path,
+        segment_pooler: Optional[SegmentPooler] = None,
+    ) -> None:
         """
         Initializes the TempoAnalyzer with the TempoCNN model.
 
         Args:
             model_weights_path (Path): Path to the TempoCNN model's weights.
+            segment_pooler (Optional[SegmentPooler]): Instance for pooling
+                local tempo estimates into segments. Defaults to 10-second
+                segments.
         """
         self.model = TempoCNN(graphFilename=str(model_weights_path))
+        self.segment_pooler = segment_pooler or SegmentPooler()
         super().__init__("tempo")
 
     def analyze(self, audio: np.ndarray) -> int:
@@ -44,3 +56,31 @@ class TempoAnalyzer(MusicAnalyzer):
         global_tempo, _, _ = self.model(audio)
         logger.info(f"Predicted tempo: {global_tempo}")
         return round(global_tempo)
+
+    def analyze_with_timeline(
+        self, audio: np.ndarray
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Analyzes an audio signal and estimates its global tempo, as well as
+        a local tempo curve pooled from the local tempo estimates that
+        TempoCNN computes alongside the global tempo.
+
+        Args:
+            audio (np.ndarray): The audio signal to be analyzed.
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: The estimated global tempo, and
+                the segments of the signal with their "start" and "end" times
+                in seconds and their median "bpm". Consecutive segments with
+                the same tempo are merged.
+        """
+        global_tempo, local_tempo, _ = self.model(audio)
+        logger.info(f"Predicted tempo: {global_tempo}")
+        boundaries, segment_tempo = self.segment_pooler.pool(
+            local_tempo, len(audio), reduce=np.nanmedian
+        )
+        tempo_curve = self.segment_pooler.merge(
+            boundaries, np.round(segment_tempo).astype(int), "bpm"
+        )
+        logger.info(f"Predicted tempo curve: {tempo_curve}")
+        return round(global_tempo), tempo_curve
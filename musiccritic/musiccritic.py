@@ -6,18 +6,22 @@ critiques a song based on its music features and lyrics.
 import argparse
 import os
 from pathlib import Path
+from typing import Dict, List
 
 from musiccritic import Configs, configs
 from musiccritic.chatgpt import ChatGPT
 from musiccritic.chatgptpromptpreparer import ChatGPTPromptPreparer
 from musiccritic.critic import Critic
+from musiccritic.hedging import RequestHedger
 from musiccritic.musicanalysis.essentiaembeddinganalyzer import (
     create_essentia_jamendo_analyzer,
     create_voice_gender_analyzer,
 )
 from musiccritic.musicanalysis.musicanalyzers import MusicAnalyzers
+from musiccritic.musicanalysis.segmentpooler import SegmentPooler
 from musiccritic.musicanalysis.tempoanalyzer import TempoAnalyzer
-from musiccritic.prompt import chat_gpt_messages
+from musiccritic.pipeline import CritiquePipeline
+from musiccritic.prompt import chat_gpt_messages, chat_gpt_personas
 from musiccritic.whisper import Whisper
 
 
@@ -25,21 +29,107 @@ def main():
     """Main function that runs the Critic application."""
 
     command_line_args = _parse_command_line_args()
-    song_path = Path(command_line_args.song_path)
-    if not song_path.exists():
-        print(f"The file {song_path} does not exist.")
-        return
+    song_paths = [
+        Path(song_path) for song_path in command_line_args.song_paths
+    ]
+    for song_path in song_paths:
+        if not song_path.exists():
+            print(f"The file {song_path} does not exist.")
+            return
 
-    music_analyzers = _create_music_analyzers(configs)
-    lyrics_transcriber = Whisper(os.getenv("OPENAI_API_KEY"))
+    music_analyzers = create_music_analyzers(
+        configs, time_resolved=command_line_args.time_resolved
+    )
+    transcription_hedger = None
+    generation_hedger = None
+    if command_line_args.hedge:
+        transcription_hedger = create_hedger("transcription", configs)
+        generation_hedger = create_hedger("generation", configs)
+    lyrics_transcriber = Whisper(
+        os.getenv("OPENAI_API_KEY"), hedger=transcription_hedger
+    )
     prompt_preparer = ChatGPTPromptPreparer(chat_gpt_messages)
-    text_generator = ChatGPT(os.getenv("OPENAI_API_KEY"))
+    text_generator = ChatGPT(
+        os.getenv("OPENAI_API_KEY"), hedger=generation_hedger
+    )
 
     music_critic = Critic(
         music_analyzers, lyrics_transcriber, prompt_preparer, text_generator
     )
-    critique = music_critic.critique(song_path)
-    print(f"Here's the critique for your song:\n\n{critique}")
+    try:
+        _critique_songs(music_critic, song_paths, command_line_args)
+    finally:
+        for hedger in [transcription_hedger, generation_hedger]:
+            if hedger is not None:
+                hedger.log_metrics()
+                hedger.shutdown()
+
+
+def _critique_songs(
+    music_critic: Critic,
+    song_paths: List[Path],
+    command_line_args: argparse.Namespace,
+) -> None:
+    """
+    Critiques the given songs and prints the critiques.
+
+    Args:
+        music_critic (Critic): The critic used to critique the songs.
+        song_paths (List[Path]): The paths to the audio files of the songs.
+        command_line_args (argparse.Namespace): The parsed command-line
+            arguments.
+    """
+    personas = None
+    if command_line_args.personas:
+        personas = {
+            persona: chat_gpt_personas[persona]
+            for persona in command_line_args.personas
+        }
+
+    if len(song_paths) == 1:
+        if personas is None:
+            critique = music_critic.critique(song_paths[0])
+            print(f"Here's the critique for your song:\n\n{critique}")
+        else:
+            critiques = music_critic.critique_personas(
+                song_paths[0], personas, configs.PERSONAS_MAX_CONCURRENCY
+            )
+            _print_persona_critiques(song_paths[0], critiques)
+        return
+
+    pipeline = CritiquePipeline(
+        music_critic,
+        decoder_workers=configs.PIPELINE_DECODER_WORKERS,
+        inference_workers=configs.PIPELINE_INFERENCE_WORKERS,
+        network_workers=configs.PIPELINE_NETWORK_WORKERS,
+        queue_size=configs.PIPELINE_QUEUE_SIZE,
+        warm_up_duration=configs.WARM_UP_DURATION,
+        personas=personas,
+        personas_max_concurrency=configs.PERSONAS_MAX_CONCURRENCY,
+    )
+    critiques = pipeline.run(song_paths)
+    for song_path, critique in critiques.items():
+        if personas is None:
+            print(f"Here's the critique for {song_path}:\n\n{critique}\n")
+        else:
+            _print_persona_critiques(song_path, critique)
+
+
+def _print_persona_critiques(
+    song_path: Path, critiques: Dict[str, str]
+) -> None:
+    """
+    Prints the critiques of a song by several personas.
+
+    Args:
+        song_path (Path): The path to the audio file of the song.
+        critiques (Dict[str, str]): The critiques keyed by persona name.
+    """
+    for persona, critique in critiques.items():
+        print(
+            f"Here's the critique for {song_path} by the "
+            f"{persona.replace('_', ' ')}:\n\n{critique}\n"
+        )
 
 
 def _parse_command_line_args():
@@ -53,29 +143,58 @@ def _parse_command_line_args():
         description="Generates music critiques for a given song."
     )
     parser.add_argument(
-        "song_path",
+        "song_paths",
+        type=str,
+        nargs="+",
+        help="The paths to the audio files of the songs to critique. "
+        "Multiple songs are critiqued with a streaming pipeline.",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate OpenAI request when a request is slower than "
+        "usual, to cut tail latency.",
+    )
+    parser.add_argument(
+        "--time-resolved",
+        action="store_true",
+        help="Describe how the moods, genres, instruments, voice and tempo "
+        "of the song evolve over time in the critique prompt.",
+    )
+    parser.add_argument(
+        "--personas",
         type=str,
-        help="The path to the audio file of the song to critique.",
+        nargs="+",
+        choices=list(chat_gpt_personas),
+        help="Critique each song from several personas, analyzing it and "
+        "transcribing its lyrics only once. Personas whose critique fails "
+        "are skipped.",
     )
     return parser.parse_args()
 
 
-def _create_music_analyzers(configs: Configs) -> MusicAnalyzers:
+def create_music_analyzers(
+    configs: Configs, time_resolved: bool = False
+) -> MusicAnalyzers:
     """
     Initializes music analyzers based on provided configurations.
 
     Args:
         configs (Configs): Configuration settings for the analyzers.
+        time_resolved (bool): Whether the analyzers should also describe how
+            the song evolves over time.
 
     Returns:
         MusicAnalyzers: A collection of initialized music analyzers.
     """
+    segment_pooler = SegmentPooler(configs.SEGMENT_DURATION)
     genres_analyzer = create_essentia_jamendo_analyzer(
         configs.GENRES_EMBEDDING_MODEL_PATH,
         configs.GENRES_MODEL_WEIGHTS_PATH,
         configs.GENRES_MODEL_METADATA_PATH,
         configs.GENRES_TOP_N_LABELS,
         "genres",
+        segment_pooler,
     )
     moods_analyzer = create_essentia_jamendo_analyzer(
         configs.MOODS_EMBEDDING_MODEL_PATH,
@@ -83,6 +202,7 @@ def _create_music_analyzers(configs: Configs) -> MusicAnalyzers:
         configs.MOODS_MODEL_METADATA_PATH,
         configs.MOODS_TOP_N_LABELS,
         "moods",
+        segment_pooler,
     )
     instruments_analyzer = create_essentia_jamendo_analyzer(
         configs.INSTRUMENTS_EMBEDDING_MODEL_PATH,
@@ -90,14 +210,18 @@ def _create_music_analyzers(configs: Configs) -> MusicAnalyzers:
         configs.INSTRUMENTS_MODEL_METADATA_PATH,
         configs.INSTRUMENTS_TOP_N_LABELS,
         "instruments",
+        segment_pooler,
     )
     voice_analyzer = create_voice_gender_analyzer(
         configs.VOICE_EMBEDDING_MODEL_PATH,
         configs.VOICE_MODEL_WEIGHTS_PATH,
         configs.VOICE_MODEL_METADATA_PATH,
         "voice",
+        segment_pooler,
+    )
+    tempo_analyzer = TempoAnalyzer(
+        configs.TEMPO_MODEL_WEIGHTS_PATH, segment_pooler
     )
-    tempo_analyzer = TempoAnalyzer(configs.TEMPO_MODEL_WEIGHTS_PATH)
     analyzers = [
         genres_analyzer,
         moods_analyzer,
@@ -105,7 +229,30 @@ def _create_music_analyzers(configs: Configs) -> MusicAnalyzers:
         voice_analyzer,
         tempo_analyzer,
     ]
-    return MusicAnalyzers(analyzers)
+    return MusicAnalyzers(analyzers, time_resolved)
+
+
+def create_hedger(name: str, configs: Configs) -> RequestHedger:
+    """
+    Initializes a request hedger based on provided configurations.
+
+    Args:
+        name (str): Name of the hedged request, used in logs.
+        configs (Configs): Configuration settings for the hedger.
+
+    Returns:
+        RequestHedger: The initialized request hedger.
+    """
+    return RequestHedger(
+        name,
+        initial_threshold=configs.HEDGING_INITIAL_THRESHOLD,
+        percentile=configs.HEDGING_PERCENTILE,
+        window_size=configs.HEDGING_WINDOW_SIZE,
+        min_samples=configs.HEDGING_MIN_SAMPLES,
+        hedge_budget=configs.HEDGING_BUDGET,
+        max_concurrent_hedges=configs.HEDGING_MAX_CONCURRENT_HEDGES,
+        hedge_timeout=configs.HEDGING_HEDGE_TIMEOUT,
+    )
 
 
 if __name__ == "__main__":
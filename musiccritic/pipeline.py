@@ -0,0 +1,413 @@
+"""
+This module provides a streaming pipeline for critiquing batches of songs.
+
+Decoding, music analysis and the network-bound stages (Whisper and ChatGPT)
+run concurrently and are connected by bounded queues. Each stage has its own
+concurrency setting, so the slowest stage sets the throughput of the batch
+instead of the sum of all stages.
+
+Classes:
+    StageMetrics: Throughput and queue-depth metrics for a pipeline stage.
+    CritiquePipeline: Critiques a batch of songs with overlapping stages.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from musiccritic import logger
+from musiccritic.critic import Critic
+from musiccritic.musicanalysis.monoloader import load_mono_audio
+
+# Marker put on a queue to tell a worker that no more items will follow.
+_END_OF_STREAM = object()
+
+# A critique, or the critiques keyed by persona name when using personas.
+Critique = Union[str, Dict[str, str]]
+
+
+@dataclass
+class StageMetrics:
+    """
+    Collects throughput and queue-depth metrics for a pipeline stage. The
+    queue depth is sampled every time a worker of the stage waits for a new
+    item on its input queue. The input queue of the first stage is
+    unbounded and holds the songs that arrived but weren't decoded yet, so
+    its depth is the arrival backlog of the pipeline.
+
+    Attributes:
+        name (str): The name of the stage.
+        processed (int): Number of items the stage processed successfully.
+        failed (int): Number of items the stage failed to process.
+        busy_seconds (float): Total time the workers spent processing items.
+        max_queue_depth (int): Largest input queue depth observed.
+        queue_depth_samples (int): Number of input queue depth samples.
+        total_queue_depth (int): Sum of all sampled input queue depths.
+    """
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_samples: int = 0
+    total_queue_depth: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def mean_queue_depth(self) -> float:
+        """The average sampled depth of the stage's input queue."""
+        if self.queue_depth_samples == 0:
+            return 0.0
+        return self.total_queue_depth / self.queue_depth_samples
+
+    def record_queue_depth(self, depth: int) -> None:
+        """
+        Records a sample of the stage's input queue depth.
+
+        Args:
+            depth (int): The number of items waiting in the input queue.
+        """
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.queue_depth_samples += 1
+            self.total_queue_depth += depth
+
+    def record_item(self, seconds: float, succeeded: bool) -> None:
+        """
+        Records that the stage finished processing an item.
+
+        Args:
+            seconds (float): The time spent processing the item.
+            succeeded (bool): Whether the item was processed successfully.
+        """
+        with self._lock:
+            self.busy_seconds += seconds
+            if succeeded:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+
+class CritiquePipeline:
+    """
+    Critiques a batch of songs with a producer/consumer pipeline.
+
+    Decoder threads fill a bounded queue with decoded audio, inference
+    threads consume it and run the music analyzers, and an async network
+    stage transcribes the lyrics and generates the critiques, optionally
+    one per persona. A song that
+    fails in any stage is logged and left out of the results, so that one
+    bad file doesn't stop the batch.
+
+    Note that all inference workers share the analyzers of the critic, so
+    more than one inference worker should only be used with analyzers that
+    are safe to call from multiple threads.
+
+    Attributes:
+        critic (Critic): The critic used to analyze and critique songs.
+        decoder_workers (int): Number of threads decoding audio files.
+        inference_workers (int): Number of threads running music analysis.
+        network_workers (int): Number of concurrent Whisper/ChatGPT requests.
+        queue_size (int): Maximum number of items waiting between stages.
+        personas (Optional[Dict[str, List[Dict[str, Any]]]]): If given, the
+            ChatGPT message templates of each persona, keyed by persona
+            name. Each song is then critiqued by every persona.
+        personas_max_concurrency (int): Maximum number of persona critiques
+            generated at once for a song.
+        warm_up_duration (Optional[float]): Duration in seconds of the
+            synthetic signal used to warm up the analyzers, or None to skip
+            the warm-up.
+        metrics (Dict[str, StageMetrics]): Metrics of the last run, keyed by
+            stage name.
+    """
+
+    def __init__(
+        self,
+        critic: Critic,
+        decoder_workers: int = 2,
+        inference_workers: int = 1,
+        network_workers: int = 4,
+        queue_size: int = 4,
+        warm_up_duration: Optional[float] = 10.0,
+        personas: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        personas_max_concurrency: int = 4,
+    ) -> None:
+        """
+        Initializes the pipeline with a critic and per-stage settings.
+
+        Args:
+            critic (Critic): The critic used to analyze and critique songs.
+            decoder_workers (int): Number of threads decoding audio files.
+            inference_workers (int): Number of threads running music
+                analysis.
+            network_workers (int): Number of concurrent Whisper/ChatGPT
+                requests.
+            queue_size (int): Maximum number of items waiting between
+                stages. Bounds the memory used by decoded audio.
+            warm_up_duration (Optional[float]): Duration in seconds of the
+                synthetic signal used to warm up the analyzers before the
+                first song, or None to skip the warm-up. The warm-up is
+                skipped if the analyzers are already warmed up.
+            personas (Optional[Dict[str, List[Dict[str, Any]]]]): If given,
+                the ChatGPT message templates of each persona, keyed by
+                persona name. Each song is then critiqued by every persona,
+                reusing one analysis and transcription.
+            personas_max_concurrency (int): Maximum number of persona
+                critiques generated at once for a song.
+        """
+        self.critic = critic
+        self.decoder_workers = decoder_workers
+        self.inference_workers = inference_workers
+        self.network_workers = network_workers
+        self.queue_size = queue_size
+        self.warm_up_duration = warm_up_duration
+        self.personas = personas
+        self.personas_max_concurrency = personas_max_concurrency
+        self.metrics = self._create_metrics()
+
+    def run(
+        self,
+        song_paths: Iterable[Path],
+        on_critique: Optional[Callable[[int, Path, Critique], None]] = None,
+    ) -> Dict[Path, Critique]:
+        """
+        Critiques a batch of songs.
+
+        Args:
+            song_paths (Iterable[Path]): The paths to the audio files to
+                critique. Songs are read lazily, so the iterable can also
+                yield songs as they arrive.
+            on_critique (Optional[Callable[[int, Path, Critique], None]]): If
+                given, called with the index of the song in `song_paths`, its
+                path and its critique as soon as each critique is ready.
+
+        Returns:
+            Dict[Path, Critique]: The critiques keyed by song path, in the
+                order of `song_paths`. With personas, each critique is a
+                dictionary keyed by persona name. Songs that failed are left
+                out.
+        """
+        self.metrics = self._create_metrics()
+        start = time.perf_counter()
+        read_song_paths = []
+        critiques = asyncio.run(
+            self._run(song_paths, read_song_paths, on_critique)
+        )
+        logger.info(
+            "Critiqued %d of %d songs in %.2f seconds.",
+            len(critiques),
+            len(read_song_paths),
+            time.perf_counter() - start,
+        )
+        self._log_metrics()
+        return {
+            read_song_paths[index]: critiques[index]
+            for index in sorted(critiques)
+        }
+
+    async def _run(
+        self,
+        song_paths: Iterable[Path],
+        read_song_paths: List[Path],
+        on_critique: Optional[Callable[[int, Path, Critique], None]],
+    ) -> Dict[int, Critique]:
+        loop = asyncio.get_running_loop()
+        # One extra thread is used to wait for the worker threads to finish.
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.network_workers + 1)
+        )
+
+        paths_queue = queue.Queue()
+        feeder_thread = threading.Thread(
+            target=self._feed,
+            args=(song_paths, read_song_paths, paths_queue),
+            daemon=True,
+        )
+        feeder_thread.start()
+        decoded_queue = queue.Queue(maxsize=self.queue_size)
+        analysed_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        decoder_threads = self._start_threads(
+            self._decode, self.decoder_workers, paths_queue, decoded_queue
+        )
+        # The analyzers are warmed up while the first songs are decoded.
+        music_analyzers = self.critic.music_analyzers
+        if self.warm_up_duration is not None and not music_analyzers.is_ready:
+            await asyncio.to_thread(
+                music_analyzers.warm_up, self.warm_up_duration
+            )
+        inference_threads = self._start_threads(
+            self._analyze,
+            self.inference_workers,
+            decoded_queue,
+            analysed_queue,
+            loop,
+        )
+        critiques = {}
+        network_tasks = [
+            asyncio.create_task(
+                self._critique(analysed_queue, critiques, on_critique)
+            )
+            for _ in range(self.network_workers)
+        ]
+
+        await asyncio.to_thread(
+            self._join_threads, [feeder_thread] + decoder_threads
+        )
+        for _ in range(self.inference_workers):
+            await asyncio.to_thread(decoded_queue.put, _END_OF_STREAM)
+        await asyncio.to_thread(self._join_threads, inference_threads)
+        for _ in range(self.network_workers):
+            await analysed_queue.put(_END_OF_STREAM)
+        await asyncio.gather(*network_tasks)
+        return critiques
+
+    def _feed(
+        self,
+        song_paths: Iterable[Path],
+        read_song_paths: List[Path],
+        paths_queue: queue.Queue,
+    ) -> None:
+        try:
+            for index, song_path in enumerate(song_paths):
+                read_song_paths.append(song_path)
+                paths_queue.put((index, song_path))
+        finally:
+            for _ in range(self.decoder_workers):
+                paths_queue.put(_END_OF_STREAM)
+
+    def _decode(
+        self, paths_queue: queue.Queue, decoded_queue: queue.Queue
+    ) -> None:
+        metrics = self.metrics["decoding"]
+        while True:
+            metrics.record_queue_depth(paths_queue.qsize())
+            item = paths_queue.get()
+            if item is _END_OF_STREAM:
+                return
+            index, song_path = item
+            start = time.perf_counter()
+            try:
+                audio = load_mono_audio(song_path)
+            except Exception:
+                logger.exception("Failed to decode '%s'.", song_path)
+                metrics.record_item(time.perf_counter() - start, False)
+                continue
+            metrics.record_item(time.perf_counter() - start, True)
+            decoded_queue.put((index, song_path, audio))
+
+    def _analyze(
+        self,
+        decoded_queue: queue.Queue,
+        analysed_queue: asyncio.Queue,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        metrics = self.metrics["inference"]
+        while True:
+            metrics.record_queue_depth(decoded_queue.qsize())
+            item = decoded_queue.get()
+            if item is _END_OF_STREAM:
+                return
+            index, song_path, audio = item
+            start = time.perf_counter()
+            try:
+                music_analysis = self.critic.music_analyzers.analyze_audio(
+                    audio
+                )
+            except Exception:
+                logger.exception("Failed to analyze '%s'.", song_path)
+                metrics.record_item(time.perf_counter() - start, False)
+                continue
+            metrics.record_item(time.perf_counter() - start, True)
+            # Blocks until the network stage has room for the item.
+            asyncio.run_coroutine_threadsafe(
+                analysed_queue.put((index, song_path, music_analysis)), loop
+            ).result()
+
+    async def _critique(
+        self,
+        analysed_queue: asyncio.Queue,
+        critiques: Dict[int, Critique],
+        on_critique: Optional[Callable[[int, Path, Critique], None]],
+    ) -> None:
+        metrics = self.metrics["network"]
+        while True:
+            metrics.record_queue_depth(analysed_queue.qsize())
+            item = await analysed_queue.get()
+            if item is _END_OF_STREAM:
+                return
+            index, song_path, music_analysis = item
+            start = time.perf_counter()
+            try:
+                critiques[index] = await asyncio.to_thread(
+                    self._critique_from_analysis, song_path, music_analysis
+                )
+            except Exception:
+                logger.exception("Failed to critique '%s'.", song_path)
+                metrics.record_item(time.perf_counter() - start, False)
+                continue
+            metrics.record_item(time.perf_counter() - start, True)
+            if on_critique is not None:
+                on_critique(index, song_path, critiques[index])
+
+    def _critique_from_analysis(
+        self, song_path: Path, music_analysis: Dict[str, Any]
+    ) -> Critique:
+        if self.personas is None:
+            return self.critic.critique_from_analysis(
+                song_path, music_analysis
+            )
+        return self.critic.critique_personas_from_analysis(
+            song_path,
+            music_analysis,
+            self.personas,
+            self.personas_max_concurrency,
+        )
+
+    def _create_metrics(self) -> Dict[str, StageMetrics]:
+        return {
+            name: StageMetrics(name)
+            for name in ("decoding", "inference", "network")
+        }
+
+    def _log_metrics(self) -> None:
+        for metrics in self.metrics.values():
+            logger.info(
+                "Stage '%s': %d processed, %d failed, %.2f busy seconds.",
+                metrics.name,
+                metrics.processed,
+                metrics.failed,
+                metrics.busy_seconds,
+            )
+            if metrics.queue_depth_samples > 0:
+                logger.info(
+                    "Stage '%s' input queue depth: mean %.2f, max %d.",
+                    metrics.name,
+                    metrics.mean_queue_depth,
+                    metrics.max_queue_depth,
+                )
+
+    @staticmethod
+    def _start_threads(
+        target, num_threads: int, *args
+    ) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(target=target, args=args, daemon=True)
+            for _ in range(num_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    @staticmethod
+    def _join_threads(threads: List[threading.Thread]) -> None:
+        for thread in threads:
+            thread.join()
@@ -3,6 +3,7 @@ This module contains prompts for generating a critique of a song using ChatGPT.
 """
 
 from string import Template
+from typing import Any, Dict, List
 
 SYSTEM_PROMPT = """
 You are a grumpy classical composer who can't stand popular music. You roast 
@@ -10,6 +11,18 @@ pop songs, writing critiques that are funny, witty, and harsh. You can also
 think of yourself as Simon Cowell. You're a tough critic.
 """
 
+ENCOURAGING_PRODUCER_SYSTEM_PROMPT = """
+You are a warm, experienced music producer who mentors young artists. You 
+write critiques that are honest but encouraging, pointing out what works in 
+a song and giving concrete, practical suggestions to improve it.
+"""
+
+ITALIAN_OPERA_SINGER_SYSTEM_PROMPT = """
+You are a dramatic Italian opera singer who judges every song against Verdi 
+and Puccini. You write theatrical, over-the-top critiques full of passion. 
+Always write your critique in Italian.
+"""
+
 USER_PROMPT = """
 Write a critique for a song with the musical characteristics / tags below. For 
 your critique, also consider the theme of the song and the lyrics. Sprinkle 
@@ -20,13 +33,38 @@ a few funny metaphors.
 - instruments: $instruments
 - voice: $voice
 - tempo: $tempo
-
+$timeline
 [lyrics start here]
 $lyrics
 [lyrics end here]
 """
 
-chat_gpt_messages = [
-    {"role": "system", "content": SYSTEM_PROMPT},
-    {"role": "user", "content": Template(USER_PROMPT)},
-]
+
+def create_chat_gpt_messages(system_prompt: str) -> List[Dict[str, Any]]:
+    """
+    Creates the ChatGPT message templates for a persona.
+
+    Args:
+        system_prompt (str): The system prompt describing the persona.
+
+    Returns:
+        List[Dict[str, Any]]: The message templates, with the user prompt
+            left to be filled by `ChatGPTPromptPreparer`.
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": Template(USER_PROMPT)},
+    ]
+
+
+chat_gpt_messages = create_chat_gpt_messages(SYSTEM_PROMPT)
+
+chat_gpt_personas = {
+    "grumpy_composer": chat_gpt_messages,
+    "encouraging_producer": create_chat_gpt_messages(
+        ENCOURAGING_PRODUCER_SYSTEM_PROMPT
+    ),
+    "italian_opera_singer": create_chat_gpt_messages(
+        ITALIAN_OPERA_SINGER_SYSTEM_PROMPT
+    ),
+}
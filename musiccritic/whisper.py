@@ -1,8 +1,11 @@
+import functools
 from pathlib import Path
+from typing import Optional
 
 from openai import OpenAI
 
 from musiccritic import logger
+from musiccritic.hedging import RequestHedger
 
 
 class Whisper:
@@ -17,12 +20,16 @@ class Whisper:
         openai_api_key (str): The API key for authenticating requests to OpenAI.
         model (str): The version of the Whisper model to use for transcription.
             Defaults to 'whisper-1'.
+        hedger (Optional[RequestHedger]): If given, used to send hedged
+            requests to cut the tail latency of slow transcriptions.
     """
 
     def __init__(
         self,
         openai_api_key: str,
         model: str = "whisper-1",
+        hedger: Optional[RequestHedger] = None,
+        base_url: Optional[str] = None,
     ) -> None:
         """
         Initializes the Whisper class with the necessary authentication details
@@ -33,10 +40,21 @@ class Whisper:
                 OpenAI.
             model: The version of the Whisper model to use for
                 transcription. Defaults to 'whisper-1'.
+            hedger: If given, used to send hedged requests.
+            base_url: If given, the URL of an OpenAI-compatible API to use
+                instead of OpenAI's, e.g. a local server for load tests.
         """
         self.openai_api_key = openai_api_key
         self.model = model
-        self._client = OpenAI(api_key=openai_api_key)
+        self.hedger = hedger
+        self._client = OpenAI(api_key=openai_api_key, base_url=base_url)
+        self._hedge_client = None
+        if hedger is not None:
+            # Only duplicates are bounded, so a slow but valid transcription
+            # still gets the client's default timeout and retries.
+            self._hedge_client = self._client.with_options(
+                timeout=hedger.hedge_timeout, max_retries=0
+            )
 
     def transcribe(self, audio_file_path: Path) -> str:
         """
@@ -55,13 +73,32 @@ class Whisper:
         logger.info(
             "Transcribing audio file '%s' with Whisper API.", audio_file_path
         )
-        with open(audio_file_path, "rb") as audio_file:
-            transcription = self._client.audio.transcriptions.create(
-                model=self.model,
-                file=audio_file,
+        if self.hedger is None:
+            transcription = self._create_transcription(
+                self._client, audio_file_path
+            )
+        else:
+            transcription = self.hedger.call(
+                functools.partial(
+                    self._create_transcription, self._client, audio_file_path
+                ),
+                functools.partial(
+                    self._create_transcription,
+                    self._hedge_client,
+                    audio_file_path,
+                ),
             )
         logger.info(
             "Finished transcribing audio file '%s' with Whisper API.",
             audio_file_path,
         )
         return transcription.text
+
+    def _create_transcription(self, client: OpenAI, audio_file_path: Path):
+        # The file is opened per request, so hedged requests don't share
+        # a file handle.
+        with open(audio_file_path, "rb") as audio_file:
+            return client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+            )